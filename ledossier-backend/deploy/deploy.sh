@@ -17,7 +17,7 @@ cd "$(dirname "$0")/.."
 npx esbuild lambda/idea-intake/index.ts \
   --bundle \
   --platform=node \
-  --target=node18 \
+  --target=node22 \
   --outfile=deploy/dist/idea-intake/index.js \
   --minify \
   --sourcemap
@@ -26,7 +26,7 @@ echo "==> Bundling Lambda: surveillance..."
 npx esbuild lambda/surveillance/index.ts \
   --bundle \
   --platform=node \
-  --target=node18 \
+  --target=node22 \
   --outfile=deploy/dist/surveillance/index.js \
   --minify \
   --sourcemap
@@ -35,7 +35,7 @@ echo "==> Bundling Lambda: idea-view..."
 npx esbuild lambda/idea-view/index.ts \
   --bundle \
   --platform=node \
-  --target=node18 \
+  --target=node22 \
   --outfile=deploy/dist/idea-view/index.js \
   --minify \
   --sourcemap
@@ -61,7 +61,7 @@ echo "==> Deploying CloudFormation stack..."
 aws cloudformation deploy \
   --template-file deploy/template.yaml \
   --stack-name "${STACK_NAME}" \
-  --parameter-overrides "GeminiApiKey=${GEMINI_API_KEY}" \
+  --parameter-overrides "GeminiApiKey=${GEMINI_API_KEY}" "BedrockRegions=${BEDROCK_REGIONS:-}" \
   --capabilities CAPABILITY_NAMED_IAM \
   --region "${REGION}" \
   --no-fail-on-empty-changeset
@@ -70,7 +70,9 @@ export async function searchWithGemini(
     const fallbackPrompt = FALLBACK_PROMPT
       .replace("{enrichedDescription}", enrichedDescription)
       .replace("{searchQueries}", queriesText);
-    const fallbackRaw = await callBedrock(fallbackPrompt);
-    return parseAIJson(fallbackRaw, "BedrockResearchFallback");
+    // Research must be fresh on every (re-)trigger, so skip the reply cache here as with Gemini
+    return callBedrock(fallbackPrompt, { noCache: true }, (raw) =>
+      parseAIJson(raw, "BedrockResearchFallback")
+    );
   }
 }
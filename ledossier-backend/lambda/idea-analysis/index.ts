@@ -29,6 +29,5 @@ export async function analyzeIdea(
   rawInput: string
 ): Promise<any> {
   const prompt = PROMPT.replace("{title}", title).replace("{rawInput}", rawInput);
-  const raw = await callBedrock(prompt);
-  return parseAIJson(raw, "IdeaAnalysis");
+  return callBedrock(prompt, undefined, (raw) => parseAIJson(raw, "IdeaAnalysis"));
 }
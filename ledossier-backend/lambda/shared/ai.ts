@@ -1,75 +1,393 @@
-import { BedrockRuntimeClient, ConverseCommand } from "@aws-sdk/client-bedrock-runtime";
+import { BedrockRuntimeClient, ConverseStreamCommand } from "@aws-sdk/client-bedrock-runtime";
+import { NodeHttpHandler } from "@smithy/node-http-handler";
+import { Agent } from "https";
+import { createHash } from "crypto";
 
-const bedrock = new BedrockRuntimeClient({});
+// Bedrock calls are spread round-robin across BEDROCK_REGIONS (comma-separated, defaults to the
+// Lambda's own region) so bursts draw on several regional quotas instead of one.
+const BEDROCK_REGIONS = (process.env.BEDROCK_REGIONS || process.env.AWS_REGION || "us-east-1")
+  .split(",")
+  .map((region) => region.trim())
+  .filter(Boolean);
+if (BEDROCK_REGIONS.length === 0) {
+  throw new Error(`BEDROCK_REGIONS contains no regions: "${process.env.BEDROCK_REGIONS}"`);
+}
+
+// A region that throttles is skipped for this long before it rejoins the rotation
+const THROTTLE_COOLDOWN_MS = 30000;
+
+// Shared across warm invocations: keep-alive sockets skip repeat TLS handshakes, and the
+// larger pool lets the fan-out helpers below run without queueing on the default 50 sockets.
+const httpsAgent = new Agent({ keepAlive: true, maxSockets: 64 });
+
+const bedrockPool = BEDROCK_REGIONS.map((region) => ({
+  region,
+  client: new BedrockRuntimeClient({
+    region,
+    // withRetry below owns retries (rotating regions between attempts); a second SDK-level
+    // layer would multiply the request count behind API Gateway's 29s timeout
+    maxAttempts: 1,
+    // Not for retries: adaptive mode keeps the SDK's client-side token-bucket rate limiter,
+    // which slows sends to a region after it starts throttling
+    retryMode: "adaptive",
+    requestHandler: new NodeHttpHandler({
+      httpsAgent,
+      connectionTimeout: 2000,
+      requestTimeout: 60000,
+    }),
+  }),
+  throttledUntil: 0,
+}));
+let nextBedrock = 0;
+
+function pickBedrock() {
+  const now = Date.now();
+  for (let i = 0; i < bedrockPool.length; i++) {
+    const index = (nextBedrock + i) % bedrockPool.length;
+    if (bedrockPool[index].throttledUntil <= now) {
+      nextBedrock = index + 1;
+      return bedrockPool[index];
+    }
+  }
+  // Every region is cooling down — keep rotating rather than failing outright
+  return bedrockPool[nextBedrock++ % bedrockPool.length];
+}
+
+export interface BedrockConfig {
+  maxTokens?: number;
+  temperature?: number;
+  noCache?: boolean;
+}
+
+const BEDROCK_MODEL_ID = "nvidia.nemotron-nano-12b-v2";
+const GEMINI_MODEL_ID = "gemini-2.0-flash";
+// Fixed for the lifetime of the container, so build it once rather than per call
+const GEMINI_URL = `https://generativelanguage.googleapis.com/v1beta/models/${GEMINI_MODEL_ID}:generateContent?key=${process.env.GEMINI_API_KEY}`;
+
+// In-process reply cache. Lives for the lifetime of a warm Lambda container, so repeated
+// prompts (pipeline retries, re-submitted ideas) skip the model call entirely.
+const CACHE_TTL_MS = 10 * 60 * 1000;
+const CACHE_MAX_ENTRIES = 4096;
+const replyCache = new Map<string, { value: any; expiresAt: number }>();
+export const cacheStats = { hits: 0, misses: 0, coalesced: 0 };
+
+function cacheKey(...parts: (string | number)[]): string {
+  // Hash so long prompts aren't retained as map keys
+  return createHash("sha256").update(parts.join("\u0000")).digest("hex");
+}
+
+// Calls currently waiting on the model, so concurrent identical prompts share one request
+const INFLIGHT_MAX_ENTRIES = 256;
+const inflight = new Map<string, Promise<any>>();
+
+// Serves `load` from the reply cache. `accept` turns the raw reply into what the caller wants
+// and throws to reject it; a reply is only stored once accepted, and empty replies or a
+// ttlMs of 0 are never stored (concurrent identical calls are still coalesced).
+async function withCache<V, R>(
+  key: string,
+  options: { noCache?: boolean; ttlMs?: number },
+  load: () => Promise<V>,
+  accept: (value: V) => R
+): Promise<R> {
+  if (options.noCache) return accept(await load());
+  const ttlMs = options.ttlMs ?? CACHE_TTL_MS;
+
+  const entry = replyCache.get(key);
+  if (entry && entry.expiresAt > Date.now()) {
+    cacheStats.hits++;
+    return accept(entry.value);
+  }
+  if (entry) replyCache.delete(key);
+
+  const pending = inflight.get(key);
+  if (pending) {
+    cacheStats.coalesced++;
+    return accept(await pending);
+  }
+  // Uncached (ttlMs 0) paths can never hit, so keep them out of the hit/miss ratio
+  if (ttlMs > 0) cacheStats.misses++;
+
+  const request = load();
+  if (inflight.size < INFLIGHT_MAX_ENTRIES) {
+    inflight.set(key, request);
+    request.then(
+      () => inflight.delete(key),
+      () => inflight.delete(key)
+    );
+  }
+
+  const value = await request;
+  const result = accept(value);
+  if (ttlMs > 0 && value) {
+    if (replyCache.size >= CACHE_MAX_ENTRIES) {
+      // Map iterates in insertion order, so the first key is the oldest entry
+      replyCache.delete(replyCache.keys().next().value!);
+    }
+    replyCache.set(key, { value, expiresAt: Date.now() + ttlMs });
+  }
+  return result;
+}
+
+const RETRY_BASE_DELAY_MS = 500;
+const RETRY_MAX_DELAY_MS = 4000;
+
+// POST /ideas runs synchronously behind API Gateway's 29s integration timeout, so retries are
+// bounded by total elapsed time as well as attempt count. Gemini gets a short budget because
+// gemini-research already falls back to Bedrock when it fails.
+const BEDROCK_RETRY = { maxAttempts: 4, budgetMs: 12000 };
+const GEMINI_RETRY = { maxAttempts: 2, budgetMs: 3000 };
+
+const RETRYABLE_BEDROCK_ERRORS = new Set([
+  "ThrottlingException",
+  "ServiceUnavailableException",
+  "ModelTimeoutException",
+  "ModelNotReadyException",
+  "InternalServerException",
+]);
+
+function isRetryableBedrockError(err: any): boolean {
+  return RETRYABLE_BEDROCK_ERRORS.has(err?.name);
+}
+
+function isRetryableGeminiError(err: any): boolean {
+  return err?.status === 429 || err?.status >= 500;
+}
+
+// Exponential backoff with full jitter, retrying only errors `isRetryable` accepts. Gives up
+// once `maxAttempts` is reached or the next wait would run past `budgetMs` since the first try.
+async function withRetry<T>(
+  label: string,
+  policy: { maxAttempts: number; budgetMs: number },
+  isRetryable: (err: any) => boolean,
+  fn: () => Promise<T>
+): Promise<T> {
+  const startedAt = Date.now();
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await fn();
+    } catch (err: any) {
+      if (attempt >= policy.maxAttempts || !isRetryable(err)) throw err;
+      const cap = Math.min(RETRY_MAX_DELAY_MS, RETRY_BASE_DELAY_MS * 2 ** (attempt - 1));
+      const delay = Math.random() * cap;
+      if (Date.now() - startedAt + delay > policy.budgetMs) throw err;
+      console.warn(`[${label}] Attempt ${attempt} failed (${err.status ?? err.name}), retrying in ${Math.round(delay)}ms`);
+      await new Promise((resolve) => setTimeout(resolve, delay));
+    }
+  }
+}
+
+// Yields reply text as Bedrock generates it, for callers that can render incrementally.
+// Streamed replies bypass the reply cache.
+export async function* streamBedrock(
+  prompt: string,
+  config?: BedrockConfig
+): AsyncGenerator<string> {
+  const target = pickBedrock();
+  try {
+    const response = await target.client.send(
+      new ConverseStreamCommand({
+        modelId: BEDROCK_MODEL_ID,
+        messages: [{ role: "user", content: [{ text: prompt }] }],
+        inferenceConfig: {
+          maxTokens: config?.maxTokens ?? 4096,
+          temperature: config?.temperature ?? 0.4,
+          topP: 0.9,
+        },
+      })
+    );
+    for await (const event of response.stream ?? []) {
+      const text = event.contentBlockDelta?.delta?.text;
+      if (text) yield text;
+    }
+  } catch (err: any) {
+    if (err?.name === "ThrottlingException") {
+      console.warn(`[Bedrock] ${target.region} throttled, cooling down for ${THROTTLE_COOLDOWN_MS}ms`);
+      target.throttledUntil = Date.now() + THROTTLE_COOLDOWN_MS;
+    }
+    throw err;
+  }
+}
 
+// Pass `parse` when the caller needs structured output: its result is returned instead of the
+// raw text, and the reply is only cached if `parse` doesn't throw.
+export async function callBedrock(prompt: string, config?: BedrockConfig): Promise<string>;
+export async function callBedrock<T>(
+  prompt: string,
+  config: BedrockConfig | undefined,
+  parse: (raw: string) => T
+): Promise<T>;
 export async function callBedrock(
   prompt: string,
-  config?: { maxTokens?: number; temperature?: number }
-): Promise<string> {
-  const response = await bedrock.send(
-    new ConverseCommand({
-      modelId: "nvidia.nemotron-nano-12b-v2",
-      messages: [{ role: "user", content: [{ text: prompt }] }],
-      inferenceConfig: {
-        maxTokens: config?.maxTokens ?? 4096,
-        temperature: config?.temperature ?? 0.4,
-        topP: 0.9,
-      },
-    })
+  config?: BedrockConfig,
+  parse: (raw: string) => any = (raw) => raw
+): Promise<any> {
+  const maxTokens = config?.maxTokens ?? 4096;
+  const temperature = config?.temperature ?? 0.4;
+  const key = cacheKey(BEDROCK_MODEL_ID, maxTokens, temperature, prompt);
+
+  return withCache(
+    key,
+    { noCache: config?.noCache },
+    () =>
+      // Covers both the initial request and throttles raised mid-stream
+      withRetry("Bedrock", BEDROCK_RETRY, isRetryableBedrockError, async () => {
+        let text = "";
+        for await (const chunk of streamBedrock(prompt, { maxTokens, temperature })) {
+          text += chunk;
+        }
+        return text;
+      }),
+    parse
   );
-  return response.output?.message?.content?.[0]?.text ?? "";
 }
 
+// Grounded search results go stale and the manual surveillance trigger exists to fetch fresh
+// ones, so Gemini replies are never cached — identical concurrent calls are only coalesced.
 export async function callGemini(prompt: string): Promise<{ text: string; groundingMetadata: any }> {
-  const GEMINI_API_KEY = process.env.GEMINI_API_KEY!;
-  const url = `https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key=${GEMINI_API_KEY}`;
-
-  const response = await fetch(url, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({
-      contents: [{ parts: [{ text: prompt }] }],
-      tools: [{ googleSearch: {} }],
-      generationConfig: { temperature: 0.3, maxOutputTokens: 4096 },
-    }),
+  return withCache(
+    cacheKey(GEMINI_MODEL_ID, prompt),
+    { ttlMs: 0 },
+    () =>
+      withRetry("Gemini", GEMINI_RETRY, isRetryableGeminiError, async () => {
+        const response = await fetch(GEMINI_URL, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({
+            contents: [{ parts: [{ text: prompt }] }],
+            tools: [{ googleSearch: {} }],
+            generationConfig: { temperature: 0.3, maxOutputTokens: 4096 },
+          }),
+        });
+
+        if (!response.ok) {
+          const errText = await response.text();
+          throw Object.assign(new Error(`Gemini API error ${response.status}: ${errText}`), {
+            status: response.status,
+          });
+        }
+
+        const data = await response.json();
+        const text: string = data.candidates?.[0]?.content?.parts?.[0]?.text ?? "";
+        return { text, groundingMetadata: data.candidates?.[0]?.groundingMetadata };
+      }),
+    (result) => result
+  );
+}
+
+// Runs `fn` over `items` with at most `limit` calls in flight, preserving input order.
+export async function mapWithConcurrency<T, R>(
+  items: T[],
+  limit: number,
+  fn: (item: T, index: number) => Promise<R>
+): Promise<R[]> {
+  const results: R[] = new Array(items.length);
+  const workerCount = Number.isFinite(limit) ? Math.max(1, Math.floor(limit)) : 1;
+  let next = 0;
+  const workers = Array.from({ length: Math.min(workerCount, items.length) }, async () => {
+    while (next < items.length) {
+      const index = next++;
+      results[index] = await fn(items[index], index);
+    }
   });
+  await Promise.all(workers);
+  return results;
+}
 
-  if (!response.ok) {
-    const errText = await response.text();
-    throw new Error(`Gemini API error ${response.status}: ${errText}`);
+// Splits `items` into consecutive groups of `size`; a non-finite or sub-1 size becomes 1
+function chunk<T>(items: T[], size: number): T[][] {
+  const step = Number.isFinite(size) ? Math.max(1, Math.floor(size)) : 1;
+  const chunks: T[][] = [];
+  for (let i = 0; i < items.length; i += step) {
+    chunks.push(items.slice(i, i + step));
   }
+  return chunks;
+}
 
-  const data = await response.json();
-  const text = data.candidates?.[0]?.content?.parts?.[0]?.text ?? "";
-  return { text, groundingMetadata: data.candidates?.[0]?.groundingMetadata };
+function buildBatchedPrompt(prompts: string[]): string {
+  const numbered = prompts.map((p, i) => `${i + 1}) ${p}`).join("\n\n");
+  return `Answer each of the following ${prompts.length} prompts independently.
+
+${numbered}
+
+Return ONLY a JSON array of exactly ${prompts.length} strings (no markdown fencing, no explanation), where element N is the complete answer to prompt N.`;
 }
 
-export function parseAIJson(raw: string, label: string = "AI", requiredFields?: string[]): any {
-  console.log(`[${label}] Raw response (${raw.length} chars):`, raw.substring(0, 500));
+function parseBatchedReply(raw: string, expected: number, label: string): string[] {
+  const parsed = extractJson(raw, label, "array");
+  if (!Array.isArray(parsed) || parsed.length !== expected) {
+    console.error(`[${label}] Expected ${expected} answers, full raw response:`, raw);
+    throw new Error(`${label}: Expected ${expected} answers, got ${Array.isArray(parsed) ? parsed.length : typeof parsed}`);
+  }
+  return parsed.map((answer) => (typeof answer === "string" ? answer : JSON.stringify(answer)));
+}
+
+// Output budget per batched answer when config.maxTokens isn't given
+const BATCH_TOKENS_PER_PROMPT = 512;
+
+// Packs `batchSize` prompts into each Bedrock call and splits the numbered JSON reply back out.
+// Batches themselves are dispatched through callBedrock with bounded concurrency.
+// config.maxTokens is a per-prompt budget here; each call gets that times its batch length.
+export async function callBedrockBatched(
+  prompts: string[],
+  batchSize: number = 8,
+  config?: BedrockConfig,
+  concurrency: number = 4
+): Promise<string[]> {
+  const replies = await mapWithConcurrency(chunk(prompts, batchSize), concurrency, async (batch) => {
+    return callBedrock(
+      buildBatchedPrompt(batch),
+      { ...config, maxTokens: (config?.maxTokens ?? BATCH_TOKENS_PER_PROMPT) * batch.length },
+      (raw) => parseBatchedReply(raw, batch.length, "BedrockBatch")
+    );
+  });
+  return replies.flat();
+}
 
+// Gemini counterpart of callBedrockBatched; grounding metadata is dropped since it spans the whole batch.
+// All answers in a batch share callGemini's fixed 4096-token output limit, so keep batches of
+// long-form prompts small.
+export async function callGeminiBatched(
+  prompts: string[],
+  batchSize: number = 8,
+  concurrency: number = 4
+): Promise<string[]> {
+  const replies = await mapWithConcurrency(chunk(prompts, batchSize), concurrency, async (batch) => {
+    const result = await callGemini(buildBatchedPrompt(batch));
+    return parseBatchedReply(result.text, batch.length, "GeminiBatch");
+  });
+  return replies.flat();
+}
+
+// Parses model output as JSON, stripping markdown fencing and falling back to the
+// outermost {...} (or [...] when `shape` is "array") in the surrounding text.
+function extractJson(raw: string, label: string, shape: "object" | "array" = "object"): any {
   // Strip markdown fencing
-  let cleaned = raw.replace(/```json\n?|```\n?/g, "").trim();
+  const cleaned = raw.replace(/```json\n?|```\n?/g, "").trim();
 
-  let parsed: any;
   // Try direct parse first
   try {
-    parsed = JSON.parse(cleaned);
+    return JSON.parse(cleaned);
   } catch (_) {
-    // Try to extract JSON object from surrounding text
-    const match = cleaned.match(/\{[\s\S]*\}/);
+    // Try to extract JSON from surrounding text
+    const match = cleaned.match(shape === "array" ? /\[[\s\S]*\]/ : /\{[\s\S]*\}/);
     if (match) {
       try {
-        parsed = JSON.parse(match[0]);
+        return JSON.parse(match[0]);
       } catch (e: any) {
         console.error(`[${label}] Failed to parse extracted JSON:`, e.message);
         console.error(`[${label}] Full raw response:`, raw);
         throw new Error(`${label}: Could not parse AI response as JSON`);
       }
-    } else {
-      console.error(`[${label}] No JSON object found in response:`, raw);
-      throw new Error(`${label}: No JSON found in AI response`);
     }
+    console.error(`[${label}] No JSON ${shape} found in response:`, raw);
+    throw new Error(`${label}: No JSON found in AI response`);
   }
+}
+
+export function parseAIJson(raw: string, label: string = "AI", requiredFields?: string[]): any {
+  console.log(`[${label}] Raw response (${raw.length} chars):`, raw.substring(0, 500));
+
+  const parsed = extractJson(raw, label);
 
   // Validate required fields if specified
   if (requiredFields) {
@@ -30,6 +30,22 @@ export async function authenticateRequest(
 }
 
 export async function getUserFromEvent(event: any): Promise<AuthUser> {
+  // The API Gateway Cognito authorizer has already verified the ID token's signature
+  // and expiry, so reuse its claims. It accepts tokens from any app client in the
+  // pool, though, so keep the verifier's client and token-use checks here.
+  const claims = event.requestContext?.authorizer?.claims;
+  if (
+    claims?.sub &&
+    claims.aud === process.env.USER_POOL_CLIENT_ID &&
+    claims.token_use === "id"
+  ) {
+    return {
+      userId: claims.sub,
+      email: claims.email ?? "",
+      name: claims.name ?? claims.email ?? "",
+    };
+  }
+
   const authHeader =
     event.headers?.Authorization || event.headers?.authorization;
   return authenticateRequest(authHeader);
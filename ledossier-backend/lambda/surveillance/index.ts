@@ -1,7 +1,7 @@
 import { DynamoDBClient, ScanCommand } from "@aws-sdk/client-dynamodb";
 import { DynamoDBDocumentClient, UpdateCommand, PutCommand } from "@aws-sdk/lib-dynamodb";
 import { unmarshall } from "@aws-sdk/util-dynamodb";
-import { callBedrock, parseAIJson } from "../shared/ai";
+import { cacheStats, callBedrock, mapWithConcurrency, parseAIJson } from "../shared/ai";
 import { searchWithGemini } from "../gemini-research";
 import { storeToS3, getFromS3 } from "../shared/storage";
 import { success } from "../shared/responses";
@@ -184,8 +184,12 @@ async function surveilleIdea(idea: any): Promise<void> {
     needsSWOT ? getFromS3(`ideas/${ideaId}/swot.md`) : Promise.resolve(null),
   ]);
 
-  // Store research snapshots in parallel
+  // Serialize once — the compact forms are reused by every prompt below
   const researchJson = JSON.stringify(newResearch, null, 2);
+  const newResearchJson = JSON.stringify(newResearch);
+  const analysisJson = JSON.stringify(analysis);
+
+  // Store research snapshots in parallel
   await Promise.all([
     storeToS3(`ideas/${ideaId}/research-${now}.json`, researchJson, "application/json"),
     storeToS3(`ideas/${ideaId}/research.json`, researchJson, "application/json"),
@@ -209,14 +213,15 @@ async function surveilleIdea(idea: any): Promise<void> {
       : "No previous report available.";
 
     const prompt = SWOT_UPDATE_PROMPT
-      .replace("{ideaAnalysis}", JSON.stringify(analysis))
+      .replace("{ideaAnalysis}", analysisJson)
       .replace("{existingSWOT}", existingSWOT)
       .replace("{existingConfidence}", String(existingConfidence ?? 0))
       .replace("{previousReport}", previousReport)
-      .replace("{newResearch}", JSON.stringify(newResearch));
+      .replace("{newResearch}", newResearchJson);
 
-    const raw = await callBedrock(prompt);
-    swotUpdate = parseAIJson(raw, "SWOTUpdate", ["swot", "confidenceScore"]);
+    swotUpdate = await callBedrock(prompt, undefined, (raw) =>
+      parseAIJson(raw, "SWOTUpdate", ["swot", "confidenceScore"])
+    );
 
     // Retry with focused prompt if discoveries are missing
     if (!swotUpdate.report?.discoveries || swotUpdate.report.discoveries.length === 0) {
@@ -224,10 +229,11 @@ async function surveilleIdea(idea: any): Promise<void> {
       const retryPrompt = DISCOVERY_RETRY_PROMPT
         .replace("{ideaTitle}", title)
         .replace("{changeSummary}", swotUpdate.changeSummary ?? "")
-        .replace("{newResearch}", JSON.stringify(newResearch));
+        .replace("{newResearch}", newResearchJson);
       try {
-        const retryRaw = await callBedrock(retryPrompt, { maxTokens: 2048 });
-        const retryResult = parseAIJson(retryRaw, "DiscoveryRetry");
+        const retryResult = await callBedrock(retryPrompt, { maxTokens: 2048 }, (raw) =>
+          parseAIJson(raw, "DiscoveryRetry")
+        );
         if (retryResult.discoveries?.length > 0) {
           swotUpdate.report = swotUpdate.report ?? {};
           swotUpdate.report.discoveries = retryResult.discoveries;
@@ -263,12 +269,11 @@ async function surveilleIdea(idea: any): Promise<void> {
 
     const prompt = STACK_REPORT_PROMPT
       .replace("{ideaTitle}", title)
-      .replace("{ideaAnalysis}", JSON.stringify(analysis))
+      .replace("{ideaAnalysis}", analysisJson)
       .replace("{previousReport}", JSON.stringify(idea.latestReport))
-      .replace("{newResearch}", JSON.stringify(newResearch));
+      .replace("{newResearch}", newResearchJson);
 
-    const raw = await callBedrock(prompt);
-    const stackResult = parseAIJson(raw, "StackReport");
+    const stackResult = await callBedrock(prompt, undefined, (raw) => parseAIJson(raw, "StackReport"));
 
     // Retry with focused prompt if discoveries are missing
     if (!stackResult.report?.discoveries || stackResult.report.discoveries.length === 0) {
@@ -276,10 +281,11 @@ async function surveilleIdea(idea: any): Promise<void> {
       const retryPrompt = DISCOVERY_RETRY_PROMPT
         .replace("{ideaTitle}", title)
         .replace("{changeSummary}", "Consolidating latest intelligence for this idea.")
-        .replace("{newResearch}", JSON.stringify(newResearch));
+        .replace("{newResearch}", newResearchJson);
       try {
-        const retryRaw = await callBedrock(retryPrompt, { maxTokens: 2048 });
-        const retryResult = parseAIJson(retryRaw, "DiscoveryRetry");
+        const retryResult = await callBedrock(retryPrompt, { maxTokens: 2048 }, (raw) =>
+          parseAIJson(raw, "DiscoveryRetry")
+        );
         if (retryResult.discoveries?.length > 0) {
           stackResult.report = stackResult.report ?? {};
           stackResult.report.discoveries = retryResult.discoveries;
@@ -389,22 +395,17 @@ export async function handler() {
 
   // Process ideas with bounded concurrency (3 at a time)
   const CONCURRENCY = 3;
-  const queue = [...ideas];
-  const workers = Array.from({ length: Math.min(CONCURRENCY, queue.length) }, async () => {
-    while (queue.length > 0) {
-      const idea = queue.shift()!;
-      try {
-        await surveilleIdea(idea);
-        processed++;
-      } catch (err: any) {
-        failed++;
-        console.error(`[Surveillance] Failed to process idea ${idea.ideaId}:`, err.message);
-      }
+  await mapWithConcurrency(ideas, CONCURRENCY, async (idea) => {
+    try {
+      await surveilleIdea(idea);
+      processed++;
+    } catch (err: any) {
+      failed++;
+      console.error(`[Surveillance] Failed to process idea ${idea.ideaId}:`, err.message);
     }
   });
-  await Promise.all(workers);
 
   const result = { processed, failed, total };
-  console.log("[Surveillance] Sweep complete:", result);
+  console.log("[Surveillance] Sweep complete:", result, "reply cache:", cacheStats);
   return success(result);
 }
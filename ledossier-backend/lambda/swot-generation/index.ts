@@ -39,18 +39,8 @@ Return this exact JSON structure:
 
 Be specific, not generic. Reference actual findings from the research. Calibrate the confidence score carefully — most ideas should score 0.4-0.7.`;
 
-export async function generateSWOT(
-  ideaAnalysis: any,
-  researchResults: any
-): Promise<{ swotJson: any; swotMarkdown: string }> {
-  const prompt = PROMPT
-    .replace("{ideaAnalysis}", JSON.stringify(ideaAnalysis, null, 2))
-    .replace("{researchResults}", JSON.stringify(researchResults, null, 2));
-
-  const raw = await callBedrock(prompt);
-  const swotJson = parseAIJson(raw, "SWOTGeneration");
-
-  const swotMarkdown = `# SWOT Analysis
+function formatSWOTMarkdown(swotJson: any): string {
+  return `# SWOT Analysis
 
 ## Strengths
 ${swotJson.swot.strengths.map((s: string) => `- ${s}`).join("\n")}
@@ -70,6 +60,19 @@ ${swotJson.swot.threats.map((t: string) => `- ${t}`).join("\n")}
 **Rationale**: ${swotJson.confidenceRationale}
 **Recommended Next Step**: ${swotJson.recommendedNextStep}
 `;
+}
+
+export async function generateSWOT(
+  ideaAnalysis: any,
+  researchResults: any
+): Promise<{ swotJson: any; swotMarkdown: string }> {
+  const prompt = PROMPT
+    .replace("{ideaAnalysis}", JSON.stringify(ideaAnalysis, null, 2))
+    .replace("{researchResults}", JSON.stringify(researchResults, null, 2));
 
-  return { swotJson, swotMarkdown };
+  // Format inside the parse step so a reply missing SWOT sections is rejected rather than cached
+  return callBedrock(prompt, undefined, (raw) => {
+    const swotJson = parseAIJson(raw, "SWOTGeneration");
+    return { swotJson, swotMarkdown: formatSWOTMarkdown(swotJson) };
+  });
 }
@@ -44,11 +44,13 @@ export class LeDossierStack extends cdk.Stack {
     // --- Lambda Function ---
 
     const geminiApiKey = process.env.GEMINI_API_KEY ?? "PLACEHOLDER";
+    // Comma-separated regions to spread Bedrock calls across, e.g. "us-east-1,us-west-2"
+    const bedrockRegions = process.env.BEDROCK_REGIONS || this.region;
 
     const ideaIntakeFn = new lambda.NodejsFunction(this, "IdeaIntakeFn", {
       entry: path.join(__dirname, "../lambda/idea-intake/index.ts"),
       handler: "handler",
-      runtime: lambdaRuntime.Runtime.NODEJS_18_X,
+      runtime: lambdaRuntime.Runtime.NODEJS_22_X,
       timeout: cdk.Duration.seconds(60),
       memorySize: 256,
       environment: {
@@ -56,6 +58,7 @@ export class LeDossierStack extends cdk.Stack {
         UPDATES_TABLE: updatesTable.tableName,
         DOSSIER_BUCKET: dossierBucket.bucketName,
         GEMINI_API_KEY: geminiApiKey,
+        BEDROCK_REGIONS: bedrockRegions,
         USER_POOL_ID: "us-east-1_XSZEJwbSO",
         USER_POOL_CLIENT_ID: "1n389pqmf8khutobtkj23rpd8n",
       },
@@ -87,6 +90,8 @@ export class LeDossierStack extends cdk.Stack {
 
     const api = new apigateway.RestApi(this, "LeDossierApi", {
       restApiName: "LeDossier API",
+      // gzip/deflate responses over 1 KB for clients that send Accept-Encoding
+      minCompressionSize: cdk.Size.bytes(1024),
       defaultCorsPreflightOptions: {
         allowOrigins: apigateway.Cors.ALL_ORIGINS,
         allowMethods: apigateway.Cors.ALL_METHODS,
@@ -137,7 +142,7 @@ export class LeDossierStack extends cdk.Stack {
     const surveillanceFn = new lambda.NodejsFunction(this, "SurveillanceFn", {
       entry: path.join(__dirname, "../lambda/surveillance/index.ts"),
       handler: "handler",
-      runtime: lambdaRuntime.Runtime.NODEJS_18_X,
+      runtime: lambdaRuntime.Runtime.NODEJS_22_X,
       timeout: cdk.Duration.minutes(5),
       memorySize: 512,
       environment: {
@@ -145,6 +150,7 @@ export class LeDossierStack extends cdk.Stack {
         UPDATES_TABLE: updatesTable.tableName,
         DOSSIER_BUCKET: dossierBucket.bucketName,
         GEMINI_API_KEY: geminiApiKey,
+        BEDROCK_REGIONS: bedrockRegions,
       },
       bundling: { externalModules: [], minify: true, sourceMap: true },
     });
@@ -173,7 +179,7 @@ export class LeDossierStack extends cdk.Stack {
     const ideaViewFn = new lambda.NodejsFunction(this, "IdeaViewFn", {
       entry: path.join(__dirname, "../lambda/idea-view/index.ts"),
       handler: "handler",
-      runtime: lambdaRuntime.Runtime.NODEJS_18_X,
+      runtime: lambdaRuntime.Runtime.NODEJS_22_X,
       timeout: cdk.Duration.seconds(60),
       memorySize: 256,
       environment: {
@@ -181,6 +187,7 @@ export class LeDossierStack extends cdk.Stack {
         UPDATES_TABLE: updatesTable.tableName,
         DOSSIER_BUCKET: dossierBucket.bucketName,
         GEMINI_API_KEY: geminiApiKey,
+        BEDROCK_REGIONS: bedrockRegions,
         USER_POOL_ID: "us-east-1_XSZEJwbSO",
         USER_POOL_CLIENT_ID: "1n389pqmf8khutobtkj23rpd8n",
       },